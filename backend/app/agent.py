@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 from dataclasses import dataclass
-from typing import Iterable, List, Optional
+from typing import AsyncIterator, Dict, Iterable, List, Optional
 
-from openai import OpenAI
+from cachetools import TTLCache
 
+from .location import _heuristic_location
 from .schemas import HistoryItem
-from .settings import Settings
+from .settings import Settings, get_openai_client
 
 
 SYSTEM_PROMPT = """You are a helpful travel assistant focused on tourist attractions and trip planning in Canada.
@@ -20,6 +24,54 @@ Hard rules:
 Style:
 - Be concise, structured, and location-specific.
 - Use bullet points and day-by-day plans when helpful.
+
+Reference policy and style catalog (stable; identical for every request):
+
+Itinerary structure:
+- Day-by-day plans group sights by neighborhood or transit line to minimize backtracking.
+- Each day lists a morning anchor, an afternoon option, and an evening suggestion, with one indoor alternative for bad weather.
+- Half-day and full-day variants are offered when the user's pace is unknown.
+- Travel time between stops is estimated conservatively; flag any leg over 45 minutes.
+
+Seasonal guidance:
+- Winter (Dec-Mar): emphasize indoor attractions, skating, winter festivals, and layered clothing; warn about short daylight and icy sidewalks.
+- Spring (Apr-May): note variable weather, shoulder-season pricing, and blossom/park highlights.
+- Summer (Jun-Aug): emphasize festivals, patios, lakes, and hiking; warn about peak crowds and booking ahead for parks with day-use limits.
+- Fall (Sep-Nov): emphasize foliage drives, harvest markets, and thinner crowds; warn about early closures at seasonal attractions.
+
+Budget tiers (describe by category, never by business name):
+- Budget: hostels, transit passes, free museums days, picnic-friendly markets, self-guided walks.
+- Mid-range: boutique or chain hotels near transit, a mix of paid attractions and free viewpoints.
+- Premium: central lodging, private transfers, reservation-required experiences; still no named businesses.
+
+Accessibility and family notes:
+- Mention step-free access, stroller friendliness, and quieter time windows when relevant.
+- For families, prefer attractions with washrooms, food options nearby, and flexible duration.
+- For mobility concerns, prefer flat waterfront paths, funiculars/gondolas, and accessible transit stations.
+
+Transit and logistics:
+- Default to public transit and walking; describe driving only for regions with limited transit (e.g., mountain parks).
+- Note where a day pass or reloadable fare card is cheaper than single fares.
+- Recommend arriving at major attractions at opening time or late afternoon to avoid peak queues.
+- For border-adjacent trips, remind users to carry travel documents; do not give legal advice.
+
+Safety and practical tips:
+- Wildlife: keep distance, store food properly, and follow posted park guidance.
+- Weather: mountain and coastal conditions change quickly; pack layers and check forecasts same-day.
+- Emergency number is 911 across Canada; note cell coverage gaps in remote parks.
+- Recommend travel insurance generically, without naming providers.
+
+Answer formatting:
+- Lead with a one-line summary of the recommendation.
+- Use headings or bold day labels for multi-day plans.
+- Close with one clarifying question when dates, budget, or interests are unknown.
+- Keep responses under roughly 400 words unless the user asks for more detail.
+
+Refusal and neutrality rules (restated for emphasis):
+- Never output a hotel, restaurant, tour operator, or retailer name, even if the user names one first; refer to it generically instead.
+- Never compare or rank specific businesses; compare categories and neighborhoods.
+- If asked for bookings, prices at a specific business, or availability, explain that you provide neutral guidance only and describe how to evaluate options by criteria.
+- If asked about destinations outside Canada, briefly redirect to Canadian options or say the question is out of scope.
 """
 
 
@@ -29,66 +81,154 @@ class ChatMsg:
     content: str
 
 
-def _fallback_reply(user_message: str) -> str:
-    msg = user_message.lower()
-    if "toronto" in msg:
-        return (
-            "Top Toronto attractions (non-promotional):\n"
-            "- CN Tower and the waterfront area\n"
-            "- Royal Ontario Museum\n"
-            "- Distillery Historic District\n"
-            "- St. Lawrence Market area\n"
-            "- High Park (great in spring/fall)\n"
-            "- Day trip idea: Niagara Falls\n"
-        )
-    if "vancouver" in msg:
-        return (
-            "A simple Vancouver plan (non-promotional):\n"
-            "- Day 1: Stanley Park + Seawall, Granville Island, Gastown walk\n"
-            "- Day 2: Capilano area or Grouse area (weather-dependent), Kitsilano beach area\n"
-            "- Optional: Vancouver Aquarium/Science World (good for families)\n"
-        )
-    if "montreal" in msg or "montréal" in msg:
-        return (
-            "Highlights in Montreal (non-promotional):\n"
-            "- Old Montreal walking loop (historic streets)\n"
-            "- Mount Royal viewpoint\n"
-            "- Montreal Museum of Fine Arts\n"
-            "- Jean-Talon / Atwater market areas\n"
-            "- Seasonal: festivals in summer, outdoor skating in winter\n"
-        )
-    if "alberta" in msg or "banff" in msg or "jasper" in msg:
-        return (
-            "Alberta Rockies ideas (non-promotional):\n"
-            "- Banff: Lake Louise / Moraine Lake (check shuttle/season access), easy hikes\n"
-            "- Icefields Parkway scenic drive\n"
-            "- Jasper: Maligne Lake area, stargazing (dark skies)\n"
-            "- Safety: pack layers, plan for rapid weather changes\n"
-        )
-    return (
-        "Tell me the Canadian city/province (and your dates/budget/interests), and I’ll suggest top attractions, a simple itinerary, and practical tips—without promoting any businesses."
-    )
+# In-process cache for completed replies plus a single-flight registry: the
+# first caller for a key runs the OpenAI call, concurrent duplicates await the
+# same Future instead of spawning their own upstream requests.
+_REPLY_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=600)
+_REPLY_INFLIGHT: Dict[bytes, asyncio.Future] = {}
+
+
+def _cache_key(model: str, msgs: List[dict]) -> bytes:
+    payload = json.dumps([model, msgs], sort_keys=True).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+_ALBERTA_FALLBACK = (
+    "Alberta Rockies ideas (non-promotional):\n"
+    "- Banff: Lake Louise / Moraine Lake (check shuttle/season access), easy hikes\n"
+    "- Icefields Parkway scenic drive\n"
+    "- Jasper: Maligne Lake area, stargazing (dark skies)\n"
+    "- Safety: pack layers, plan for rapid weather changes\n"
+)
+
+# Pre-built replies keyed by the canonical label the location heuristic
+# returns, so dispatch is one shared keyword scan plus one dict lookup.
+_FALLBACKS: Dict[str, str] = {
+    "Toronto": (
+        "Top Toronto attractions (non-promotional):\n"
+        "- CN Tower and the waterfront area\n"
+        "- Royal Ontario Museum\n"
+        "- Distillery Historic District\n"
+        "- St. Lawrence Market area\n"
+        "- High Park (great in spring/fall)\n"
+        "- Day trip idea: Niagara Falls\n"
+    ),
+    "Vancouver": (
+        "A simple Vancouver plan (non-promotional):\n"
+        "- Day 1: Stanley Park + Seawall, Granville Island, Gastown walk\n"
+        "- Day 2: Capilano area or Grouse area (weather-dependent), Kitsilano beach area\n"
+        "- Optional: Vancouver Aquarium/Science World (good for families)\n"
+    ),
+    "Montreal": (
+        "Highlights in Montreal (non-promotional):\n"
+        "- Old Montreal walking loop (historic streets)\n"
+        "- Mount Royal viewpoint\n"
+        "- Montreal Museum of Fine Arts\n"
+        "- Jean-Talon / Atwater market areas\n"
+        "- Seasonal: festivals in summer, outdoor skating in winter\n"
+    ),
+    "Alberta": _ALBERTA_FALLBACK,
+    "Banff": _ALBERTA_FALLBACK,
+    "Jasper": _ALBERTA_FALLBACK,
+}
+
+_DEFAULT_REPLY = (
+    "Tell me the Canadian city/province (and your dates/budget/interests), and I’ll suggest top attractions, a simple itinerary, and practical tips—without promoting any businesses."
+)
+
+
+def _fallback_reply(user_message: str, lower: Optional[str] = None) -> str:
+    return _FALLBACKS.get(_heuristic_location(user_message, lower), _DEFAULT_REPLY)
+
+
+# Shared head of every request; the OpenAI client serializes it to JSON, so
+# reusing one dict object is safe.
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
 
 
 def _to_openai_messages(message: str, history: Optional[Iterable[HistoryItem]]) -> List[dict]:
-    msgs: List[dict] = [{"role": "system", "content": SYSTEM_PROMPT}]
-    if history:
-        for h in history:
-            msgs.append({"role": h.role, "content": h.content})
-    msgs.append({"role": "user", "content": message})
-    return msgs
-
-
-def generate_reply(message: str, history: Optional[List[HistoryItem]], settings: Settings) -> str:
+    # Message order matters for OpenAI's server-side prompt caching: prefixes of
+    # >=1024 tokens are cached automatically, so the static system prompt must
+    # come first and dynamic content (history, user message) strictly after it.
+    # See https://platform.openai.com/docs/guides/prompt-caching
+    return [
+        _SYSTEM_MESSAGE,
+        *({"role": h.role, "content": h.content} for h in history or ()),
+        {"role": "user", "content": message},
+    ]
+
+
+async def generate_reply(
+    message: str,
+    history: Optional[List[HistoryItem]],
+    settings: Settings,
+    lower: Optional[str] = None,
+) -> str:
+    if not settings.openai_api_key or not settings.openai_api_key.get_secret_value():
+        return _fallback_reply(message, lower)
+
+    msgs = _to_openai_messages(message, history)
+    key = _cache_key(settings.openai_model, msgs)
+    cached = _REPLY_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    inflight = _REPLY_INFLIGHT.get(key)
+    if inflight is not None:
+        return await inflight
+
+    fut: asyncio.Future = asyncio.get_running_loop().create_future()
+    _REPLY_INFLIGHT[key] = fut
+    try:
+        client = get_openai_client()
+        completion = await client.chat.completions.create(
+            model=settings.openai_model,
+            messages=msgs,
+            temperature=0.4,
+        )
+        text = (completion.choices[0].message.content or "").strip()
+        reply = text or _fallback_reply(message)
+        _REPLY_CACHE[key] = reply
+        fut.set_result(reply)
+        return reply
+    except BaseException as exc:
+        fut.set_exception(exc)
+        fut.exception()  # mark retrieved in case nobody else is awaiting
+        raise
+    finally:
+        _REPLY_INFLIGHT.pop(key, None)
+
+
+async def generate_reply_stream(
+    message: str,
+    history: Optional[List[HistoryItem]],
+    settings: Settings,
+    lower: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield the reply incrementally as the model produces it.
+
+    Streaming cuts user-perceived latency from total generation time to
+    time-to-first-token. In fallback mode the canned reply arrives as a
+    single chunk. Streamed replies bypass the response cache.
+    """
     if not settings.openai_api_key or not settings.openai_api_key.get_secret_value():
-        return _fallback_reply(message)
+        yield _fallback_reply(message, lower)
+        return
 
-    client = OpenAI(api_key=settings.openai_api_key.get_secret_value())
-    completion = client.chat.completions.create(
+    client = get_openai_client()
+    stream = await client.chat.completions.create(
         model=settings.openai_model,
         messages=_to_openai_messages(message, history),
         temperature=0.4,
+        stream=True,
     )
-    text = (completion.choices[0].message.content or "").strip()
-    return text or _fallback_reply(message)
+    got_content = False
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            got_content = True
+            yield delta
+    if not got_content:
+        yield _fallback_reply(message, lower)
 
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from openai import OpenAI
+import ahocorasick
+import orjson
+from cachetools import TTLCache
 
 from .schemas import HistoryItem
-from .settings import Settings
+from .settings import Settings, get_openai_client
 
 
 LOCATION_SYSTEM_PROMPT = """You extract a single Canadian location label from the user message, considering the chat history for context.
@@ -24,66 +28,146 @@ User: "What should I pack?" -> {"location":"General"}
 """
 
 
-def _heuristic_location(message: str) -> str:
-    m = message.lower()
-    candidates = [
-        "toronto",
-        "vancouver",
-        "montreal",
-        "calgary",
-        "edmonton",
-        "ottawa",
-        "quebec",
-        "alberta",
-        "british columbia",
-        "bc",
-        "ontario",
-        "manitoba",
-        "saskatchewan",
-        "nova scotia",
-        "new brunswick",
-        "newfoundland",
-        "pei",
-        "prince edward island",
-        "yukon",
-        "nunavut",
-        "northwest territories",
-        "banff",
-        "jasper",
-    ]
-    for c in candidates:
-        if c in m:
-            if c == "bc":
-                return "British Columbia"
-            if c == "pei":
-                return "Prince Edward Island"
-            return c.title()
-    return "General"
+# Extraction runs at temperature=0, so identical prompts are a perfect cache
+# target. The single-flight registry coalesces duplicate in-flight requests:
+# concurrent callers for the same key all await one Future / one OpenAI call.
+_LOC_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=3600)
+_LOC_INFLIGHT: Dict[bytes, asyncio.Future] = {}
+
+
+def _cache_key(model: str, msgs: List[dict]) -> bytes:
+    payload = json.dumps([model, msgs], sort_keys=True).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+_LOC_CANDIDATES = [
+    "toronto",
+    "vancouver",
+    "montreal",
+    "montréal",
+    "calgary",
+    "edmonton",
+    "ottawa",
+    "quebec",
+    "alberta",
+    "british columbia",
+    "bc",
+    "ontario",
+    "manitoba",
+    "saskatchewan",
+    "nova scotia",
+    "new brunswick",
+    "newfoundland",
+    "pei",
+    "prince edward island",
+    "yukon",
+    "nunavut",
+    "northwest territories",
+    "banff",
+    "jasper",
+]
+
+# Spellings that .title() would not canonicalize the way we want.
+_LOC_CANON = {
+    "bc": "British Columbia",
+    "pei": "Prince Edward Island",
+    "montréal": "Montreal",
+}
+
+_LOC_KEYWORDS = {c: _LOC_CANON.get(c, c.title()) for c in _LOC_CANDIDATES}
+
+# Shared head of every request; the OpenAI client serializes it to JSON, so
+# reusing one dict object is safe.
+_SYSTEM_MESSAGE = {"role": "system", "content": LOCATION_SYSTEM_PROMPT}
+
+# An Aho-Corasick automaton matches every candidate in one linear pass over
+# the message, with cost independent of how many keywords we register — so the
+# list can grow (parks, neighborhoods, ...) without slowing the heuristic.
+_LOC_AC = ahocorasick.Automaton()
+for _kw, _canon in _LOC_KEYWORDS.items():
+    _LOC_AC.add_word(_kw, (_kw, _canon))
+_LOC_AC.make_automaton()
 
+_WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789_")
 
-def extract_location(message: str, history: Optional[List[HistoryItem]], settings: Settings) -> str:
+
+def _heuristic_location(message: str, lower: Optional[str] = None) -> str:
+    # Callers that already lowercased the message (e.g. the combined endpoint,
+    # which feeds both this and the chat fallback) pass it in to avoid a second
+    # O(N) string copy.
+    m = lower if lower is not None else message.lower()
+    best_kw = ""
+    best_canon = "General"
+    for end, (kw, canon) in _LOC_AC.iter(m):
+        # Enforce word boundaries so e.g. "bc" never matches inside "quebec".
+        start = end - len(kw) + 1
+        if start > 0 and m[start - 1] in _WORD_CHARS:
+            continue
+        if end + 1 < len(m) and m[end + 1] in _WORD_CHARS:
+            continue
+        if len(kw) > len(best_kw):
+            best_kw, best_canon = kw, canon
+    return best_canon
+
+
+async def extract_location(
+    message: str,
+    history: Optional[List[HistoryItem]],
+    settings: Settings,
+    lower: Optional[str] = None,
+) -> str:
     if not settings.openai_api_key or not settings.openai_api_key.get_secret_value():
-        return _heuristic_location(message)
-
-    client = OpenAI(api_key=settings.openai_api_key.get_secret_value())
-    
-    msgs = [{"role": "system", "content": LOCATION_SYSTEM_PROMPT}]
-    if history:
-        for h in history:
-            msgs.append({"role": h.role, "content": h.content})
-    msgs.append({"role": "user", "content": message})
-
-    completion = client.chat.completions.create(
-        model=settings.openai_location_model,
-        messages=msgs,
-        temperature=0,
-        response_format={"type": "json_object"},
-    )
-    raw = (completion.choices[0].message.content or "").strip()
+        return _heuristic_location(message, lower)
+
+    # The heuristic resolves the common Canadian locations with zero latency,
+    # so only pay for an LLM round-trip when the message alone is ambiguous
+    # and there is history that might disambiguate it.
+    guess = _heuristic_location(message, lower)
+    if guess != "General" or not history:
+        return guess
+
+    # Keep the static system prompt (including its few-shot examples) as the
+    # first message and never insert dynamic content before the history, so the
+    # prefix stays eligible for OpenAI's server-side prompt caching.
+    # See https://platform.openai.com/docs/guides/prompt-caching
+    msgs = [
+        _SYSTEM_MESSAGE,
+        *({"role": h.role, "content": h.content} for h in history or ()),
+        {"role": "user", "content": message},
+    ]
+
+    key = _cache_key(settings.openai_location_model, msgs)
+    cached = _LOC_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    inflight = _LOC_INFLIGHT.get(key)
+    if inflight is not None:
+        return await inflight
+
+    fut: asyncio.Future = asyncio.get_running_loop().create_future()
+    _LOC_INFLIGHT[key] = fut
     try:
-        data = json.loads(raw)
-        loc = (data.get("location") or "").strip()
-        return loc or "General"
-    except Exception:
-        return _heuristic_location(message)
+        client = get_openai_client()
+        completion = await client.chat.completions.create(
+            model=settings.openai_location_model,
+            messages=msgs,
+            temperature=0,
+            response_format={"type": "json_object"},
+        )
+        raw = (completion.choices[0].message.content or "").strip()
+        try:
+            data = orjson.loads(raw)
+            loc = (data.get("location") or "").strip() or "General"
+        except Exception:
+            loc = _heuristic_location(message)
+        _LOC_CACHE[key] = loc
+        fut.set_result(loc)
+        return loc
+    except BaseException as exc:
+        fut.set_exception(exc)
+        fut.exception()  # mark retrieved in case nobody else is awaiting
+        raise
+    finally:
+        _LOC_INFLIGHT.pop(key, None)
 
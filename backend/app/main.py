@@ -1,22 +1,44 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+import asyncio
+from typing import AsyncIterator, Type, TypeVar
+
+import msgspec
+import orjson
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
-from .agent import generate_reply
+from .agent import generate_reply, generate_reply_stream
 from .location import extract_location
 from .schemas import (
     ChatRequest,
     ChatResponse,
+    ChatWithLocationResponse,
     ExtractLocationRequest,
     ExtractLocationResponse,
 )
 from .settings import get_settings
 
 
+T = TypeVar("T")
+
+
+def _decode_body(body: bytes, type_: Type[T]) -> T:
+    """Decode a request body into a msgspec Struct, mapping failures to 422."""
+    try:
+        return msgspec.json.decode(body, type=type_)
+    except msgspec.DecodeError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
 def create_app() -> FastAPI:
     settings = get_settings()
 
+    # No custom default_response_class: every modeled route is serialized to
+    # JSON bytes directly by Pydantic on current FastAPI, which deprecated
+    # ORJSONResponse for that case. orjson is still used where it matters:
+    # SSE chunks in /chat/stream and parsing model output in location.py.
     app = FastAPI(title="Canada Tourist Agent API", version="0.1.0")
 
     app.add_middleware(
@@ -32,13 +54,39 @@ def create_app() -> FastAPI:
         return {"ok": True}
 
     @app.post("/chat", response_model=ChatResponse)
-    def chat(req: ChatRequest) -> ChatResponse:
-        reply = generate_reply(req.message, req.history, settings=settings)
+    async def chat(request: Request) -> ChatResponse:
+        req = _decode_body(await request.body(), ChatRequest)
+        reply = await generate_reply(req.message, req.history, settings=settings)
         return ChatResponse(reply=reply)
 
+    @app.post("/chat/stream")
+    async def chat_stream(request: Request) -> StreamingResponse:
+        req = _decode_body(await request.body(), ChatRequest)
+
+        async def event_stream() -> AsyncIterator[bytes]:
+            async for delta in generate_reply_stream(req.message, req.history, settings=settings):
+                yield b"data: " + orjson.dumps({"delta": delta}) + b"\n\n"
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    @app.post("/chat-with-location", response_model=ChatWithLocationResponse)
+    async def chat_with_location(request: Request) -> ChatWithLocationResponse:
+        req = _decode_body(await request.body(), ChatRequest)
+        # Frontends otherwise call /extract-location then /chat sequentially;
+        # gathering both overlaps the two LLM round-trips. Lowercase once here
+        # rather than in each helper's keyword scan.
+        msg_lower = req.message.lower()
+        reply, loc = await asyncio.gather(
+            generate_reply(req.message, req.history, settings=settings, lower=msg_lower),
+            extract_location(req.message, req.history, settings=settings, lower=msg_lower),
+        )
+        return ChatWithLocationResponse(reply=reply, location=loc)
+
     @app.post("/extract-location", response_model=ExtractLocationResponse)
-    def extract_location_route(req: ExtractLocationRequest) -> ExtractLocationResponse:
-        loc = extract_location(req.message, req.history, settings=settings)
+    async def extract_location_route(request: Request) -> ExtractLocationResponse:
+        req = _decode_body(await request.body(), ExtractLocationRequest)
+        loc = await extract_location(req.message, req.history, settings=settings)
         return ExtractLocationResponse(location=loc)
 
     return app
@@ -46,3 +94,11 @@ def create_app() -> FastAPI:
 
 app = create_app()
 
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Match the production launch flags (see Dockerfile): uvloop and httptools
+    # are the C-level event loop and HTTP parser shipped by uvicorn[standard].
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
+
@@ -1,32 +1,55 @@
-from __future__ import annotations
-
-from typing import List, Literal, Optional
-
-from pydantic import BaseModel, Field
-
-
-Role = Literal["user", "assistant"]
-
-
-class HistoryItem(BaseModel):
-    role: Role
-    content: str = Field(min_length=1, max_length=10_000)
-
-
-class ChatRequest(BaseModel):
-    message: str = Field(min_length=1, max_length=10_000)
-    history: Optional[List[HistoryItem]] = None
-
-
-class ChatResponse(BaseModel):
-    reply: str
-
-
-class ExtractLocationRequest(BaseModel):
-    message: str = Field(min_length=1, max_length=10_000)
-    history: Optional[List[HistoryItem]] = None
-
-
-class ExtractLocationResponse(BaseModel):
-    location: str
-
+from __future__ import annotations
+
+from typing import List, Literal, Optional
+
+import msgspec
+from pydantic import BaseModel
+
+
+Role = Literal["user", "assistant"]
+
+
+# Request bodies are msgspec Structs decoded straight from bytes in the route
+# handlers (see main.py); msgspec generates a C-level decoder, which is much
+# cheaper per request than the Pydantic validator chain. Response models stay
+# Pydantic so FastAPI's response_model handling is unchanged.
+
+
+class HistoryItem(msgspec.Struct):
+    role: Role
+    content: str
+
+    def __post_init__(self) -> None:
+        if not 1 <= len(self.content) <= 10_000:
+            raise ValueError("content must be between 1 and 10000 characters")
+
+
+class ChatRequest(msgspec.Struct):
+    message: str
+    history: Optional[List[HistoryItem]] = None
+
+    def __post_init__(self) -> None:
+        if not 1 <= len(self.message) <= 10_000:
+            raise ValueError("message must be between 1 and 10000 characters")
+
+
+class ExtractLocationRequest(msgspec.Struct):
+    message: str
+    history: Optional[List[HistoryItem]] = None
+
+    def __post_init__(self) -> None:
+        if not 1 <= len(self.message) <= 10_000:
+            raise ValueError("message must be between 1 and 10000 characters")
+
+
+class ChatResponse(BaseModel):
+    reply: str
+
+
+class ExtractLocationResponse(BaseModel):
+    location: str
+
+
+class ChatWithLocationResponse(BaseModel):
+    reply: str
+    location: str
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from functools import lru_cache
+from functools import cache
 from pathlib import Path
 from typing import List, Optional
 
+import httpx
+from openai import AsyncOpenAI
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -27,21 +29,67 @@ def _candidate_env_files() -> List[Path]:
     ]
 
 
+# Resolved once at import: path resolution hits the filesystem, and tests that
+# cache_clear() get_settings would otherwise redo it per Settings instance.
+_CANDIDATE_ENV_FILES = [str(p) for p in _candidate_env_files()]
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
-        env_file=[str(p) for p in _candidate_env_files()],
+        env_file=_CANDIDATE_ENV_FILES,
         env_file_encoding="utf-8",
         extra="ignore",
+        frozen=True,
     )
 
     openai_api_key: Optional[SecretStr] = None
     openai_model: str = OPENAI_MODEL
     openai_location_model: str = OPENAI_LOCATION_MODEL
+    openai_use_aiohttp: bool = True
 
     cors_allow_origins: List[str] = CORS_ALLOW_ORIGINS
 
 
-@lru_cache
+# functools.cache skips lru_cache's LRU bookkeeping, which is pure overhead
+# for zero-argument functions; Settings is frozen, so sharing one instance
+# across threads is safe.
+@cache
 def get_settings() -> Settings:
     return Settings()
 
+
+def _build_http_client(use_aiohttp: bool) -> httpx.AsyncClient:
+    """
+    HTTP client for the OpenAI SDK.
+
+    httpx's pure-asyncio transport has known throughput cliffs under high
+    concurrency, so we prefer the SDK's aiohttp-backed client when the
+    `openai[aiohttp]` extra is installed. OPENAI_USE_AIOHTTP=false (or a
+    missing extra) falls back to plain httpx.
+    """
+    limits = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+    if use_aiohttp:
+        try:
+            from openai import DefaultAioHttpClient
+        except ImportError:
+            pass
+        else:
+            return DefaultAioHttpClient(limits=limits, timeout=30)
+    return httpx.AsyncClient(limits=limits, timeout=30)
+
+
+@cache
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Shared AsyncOpenAI client, created once per process.
+
+    Reusing one client keeps a single connection pool alive across requests
+    instead of paying a fresh TCP+TLS handshake per call.
+    """
+    settings = get_settings()
+    api_key = settings.openai_api_key.get_secret_value() if settings.openai_api_key else None
+    return AsyncOpenAI(
+        api_key=api_key,
+        http_client=_build_http_client(settings.openai_use_aiohttp),
+    )
+
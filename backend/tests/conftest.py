@@ -1,19 +1,50 @@
 from __future__ import annotations
 
 import inspect
-import json
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List
 
+import httpx
+import orjson
 import pytest
 
+from app.main import create_app
+
+
+@pytest.fixture(scope="session")
+async def client():
+    """
+    Shared HTTP client against a single app instance.
+
+    Building the FastAPI route graph and middleware stack per test was pure
+    overhead; tests that don't monkeypatch app wiring reuse this client.
+    """
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
 
 def _results_path() -> Path:
     # backend/tests/conftest.py -> backend/
     return Path(__file__).resolve().parents[1] / "test_results.json"
 
 
+# Fallback descriptions keyed by test-name fragment; scanned in order.
+_NAME_DESCRIPTIONS = {
+    "healthz": "Checks the /healthz endpoint returns 200 OK and {ok: true}.",
+    "fallback_toronto": "Checks chat fallback mode returns a Toronto-relevant, non-promotional response when no API key is used.",
+    "extract_location_fallback": "Checks location extraction fallback returns a specific location for a clear prompt and 'General' for ambiguous prompts.",
+    "validation_empty_message": "Checks request validation rejects an empty message with a 422 response.",
+    "openai_wiring_is_used": "Checks OpenAI client wiring is used when an API key is present (mocked OpenAI).",
+    "openai_real_api_call": "If an API key is present, calls the real OpenAI API; otherwise uses fallback. Records a response preview.",
+}
+
+# Memoized per nodeid: the same item is reported for setup/call/teardown, and
+# inspect.getdoc plus the keyword scan need only run once per test.
+_DESCRIPTION_CACHE: Dict[str, str] = {}
+
+
 def _description_for_item(item: pytest.Item) -> str:
     """
     Best-effort description for what a test checks.
@@ -22,27 +53,28 @@ def _description_for_item(item: pytest.Item) -> str:
     1) Test function docstring (first paragraph)
     2) Fallback based on test name
     """
+    cached = _DESCRIPTION_CACHE.get(item.nodeid)
+    if cached is not None:
+        return cached
+
+    desc = None
     obj = getattr(item, "obj", None)
     doc = inspect.getdoc(obj) if obj is not None else None
     if doc:
         # Keep the first paragraph only (up to first blank line), and normalize whitespace.
         first_para = doc.split("\n\n", 1)[0].strip()
-        return " ".join(first_para.split())
-
-    name = getattr(item, "originalname", None) or getattr(item, "name", "")
-    if "healthz" in name:
-        return "Checks the /healthz endpoint returns 200 OK and {ok: true}."
-    if "fallback_toronto" in name:
-        return "Checks chat fallback mode returns a Toronto-relevant, non-promotional response when no API key is used."
-    if "extract_location_fallback" in name:
-        return "Checks location extraction fallback returns a specific location for a clear prompt and 'General' for ambiguous prompts."
-    if "validation_empty_message" in name:
-        return "Checks request validation rejects an empty message with a 422 response."
-    if "openai_wiring_is_used" in name:
-        return "Checks OpenAI client wiring is used when an API key is present (mocked OpenAI)."
-    if "openai_real_api_call" in name:
-        return "If an API key is present, calls the real OpenAI API; otherwise uses fallback. Records a response preview."
-    return "Test description not provided."
+        desc = " ".join(first_para.split())
+    else:
+        name = getattr(item, "originalname", None) or getattr(item, "name", "")
+        for key, keyed_desc in _NAME_DESCRIPTIONS.items():
+            if key in name:
+                desc = keyed_desc
+                break
+        else:
+            desc = "Test description not provided."
+
+    _DESCRIPTION_CACHE[item.nodeid] = desc
+    return desc
 
 
 def pytest_configure(config: pytest.Config) -> None:
@@ -80,5 +112,7 @@ def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
         "exitstatus": exitstatus,
         "results": session.config._json_report_results,  # type: ignore[attr-defined]
     }
-    _results_path().write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    # orjson serializes at C speed and straight to bytes, so the session-end
+    # write is one buffer instead of a json.dumps string + encode round-trip.
+    _results_path().write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
 
@@ -292,7 +292,7 @@ echo "[run_wsl] Running backend tests (pytest)..."
 }
 
 echo "[run_wsl] Starting backend server..."
-.venv-wsl/bin/python -m uvicorn app.main:app --reload --host 0.0.0.0 --port 8000 > /tmp/backend.log 2>&1 &
+.venv-wsl/bin/python -m uvicorn app.main:app --reload --host 0.0.0.0 --port 8000 --loop uvloop --http httptools > /tmp/backend.log 2>&1 &
 BACKEND_PID=$!
 
 # Wait a moment for backend to start